@@ -1,4 +1,5 @@
 from django.contrib import admin
+
 from .models import CSVProcessingRecord, EmailRecord
 
 
@@ -17,3 +18,6 @@ class EmailRecordAdmin(admin.ModelAdmin):
     search_fields = ['email_address', 'zip_code', 'state', 'city']
     readonly_fields = ['processed_at']
 
+    def get_queryset(self, request):
+        # Fetch the parent processing record in the same query to avoid N+1 lookups
+        return super().get_queryset(request).select_related('processing_record')
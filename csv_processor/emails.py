@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.mail import EmailMessage
+
+# Bound str.format methods so the templates are built once, not per email
+SUBJECT_TEMPLATE = 'Location Information for ZIP {zip}'.format
+BODY_TEMPLATE = '''
+Hello,
+
+Here is the location information for ZIP code {zip}:
+
+City: {city}
+State: {state}
+
+Thank you!
+'''.format
+
+
+def build_location_email(email, zip_code, state, city, connection=None, from_email=None):
+    """
+    Build the location email for a single address.
+    Callers sending many emails pass from_email to skip the settings lookup.
+    """
+    if from_email is None:
+        from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com')
+    
+    return EmailMessage(
+        SUBJECT_TEMPLATE(zip=zip_code),
+        BODY_TEMPLATE(zip=zip_code, city=city, state=state),
+        from_email,
+        [email],
+        connection=connection,
+    )
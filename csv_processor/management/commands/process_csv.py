@@ -1,21 +1,100 @@
 import csv
+import errno
 import logging
 import os
+import re
 import shutil
+import socket
 import time
-from datetime import datetime
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from functools import lru_cache, partial
+from multiprocessing import get_context
 from pathlib import Path
 
 import requests
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core import mail
 from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
 
-from csv_processor.models import CSVProcessingRecord, EmailRecord
+try:
+    # Optional: COPY-based inserts, only used on PostgreSQL
+    from django_bulk_load import bulk_insert_models
+except ImportError:
+    bulk_insert_models = None
+
+try:
+    # Optional: native CSV parser for large files
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = pacsv = None
+
+from csv_processor.emails import build_location_email
+from csv_processor.models import CSVProcessingRecord, EmailRecord, ZipCache
+from csv_processor.tasks import send_location_email
+from csv_processor.workers import init_worker, process_file
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
+# Row validation, applied to stripped values: US ZIP or ZIP+4, and a basic email shape
+ZIP_RE = re.compile(r'^\d{5}(?:-\d{4})?$')
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+# Number of EmailRecord rows buffered before they are written with bulk_create
+BULK_CREATE_BATCH_SIZE = 500
+
+# Number of emails sent over the shared connection between EmailRecord writes
+EMAIL_BATCH_SIZE = 100
+
+# Rows between progress messages while processing a file
+PROGRESS_INTERVAL = 1000
+
+# Folder inside the incoming directory that holds files claimed by a worker
+CLAIM_DIR_NAME = '.claimed'
+
+# Read buffer for incoming CSV files
+CSV_READ_BUFFER_SIZE = 1 << 20
+
+# Files at least this large are parsed with pyarrow when it is installed
+ARROW_MIN_FILE_SIZE = 8 << 20
+
+# Seconds a new CSV file's size must stay unchanged before it is processed
+FILE_SETTLE_SECONDS = 0.5
+
+# os.link errors that mean hard links are unavailable, so the file is copied
+# instead: another filesystem, or a filesystem without hard link support
+LINK_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP}
+
+
+def build_session():
+    """
+    Build a requests Session shared by all ZIP API calls.
+    The connection pool is sized for the lookup thread pool so TLS
+    connections are reused, and transient failures are retried.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504]),
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+SESSION = build_session()
+
 
 def mask_email(email):
     """
@@ -40,9 +119,161 @@ def mask_email(email):
     return f"{masked_local}@{masked_domain}"
 
 
+def fetch_zip(zip_code):
+    """Fetch state and city information from ZIP code API"""
+    # The API only knows 5-digit ZIP codes, so ZIP+4 codes use their prefix
+    url = settings.ZIP_API_URL.format(zip=zip_code[:5])
+    timeout = getattr(settings, 'ZIP_API_TIMEOUT', 5)
+    
+    try:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Calling ZIP API for zip=%s, url=%s', zip_code, url)
+        response = SESSION.get(url, timeout=timeout)
+        response.raise_for_status()
+        
+        data = response.json()
+        
+        # Extract state and city from response
+        if 'places' in data and len(data['places']) > 0:
+            place = data['places'][0]
+            state = place.get('state', 'Unknown')
+            city = place.get('place name', 'Unknown')
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug('ZIP API returned: zip=%s, state=%s, city=%s',
+                            zip_code, state, city)
+            return state, city
+        else:
+            logger.warning('ZIP API returned no places for zip=%s', zip_code)
+            return 'Unknown', 'Unknown'
+            
+    except requests.RequestException as e:
+        logger.error('ZIP API request failed for zip=%s: %s', zip_code, str(e))
+        raise Exception(f'API error for ZIP {zip_code}: {str(e)}')
+
+
+@lru_cache(maxsize=None)
+def load_zip_table(path):
+    """
+    Load a local zip,state,city CSV into a dict of ZIP code -> (state, city).
+    Returns an empty dict when no dataset is configured or the file is missing.
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    
+    zip_table = {}
+    with open(path, 'r', encoding='utf-8', newline='') as csvfile:
+        for row in csv.DictReader(csvfile):
+            zip_table[row['zip'].strip()] = (row['state'].strip(), row['city'].strip())
+    logger.info('Loaded %d ZIP codes from %s', len(zip_table), path)
+    return zip_table
+
+
+def lookup_zip(zip_code):
+    """
+    Return (state, city) for a ZIP code.
+    The local ZIP_DATA_FILE dataset is consulted first, then the ZIP API.
+    API results are cached in ZipCache by lookup_locations, which honours
+    ZIP_CACHE_TIMEOUT.
+    """
+    location = load_zip_table(getattr(settings, 'ZIP_DATA_FILE', None)).get(zip_code[:5])
+    if location is not None:
+        return location
+    return fetch_zip(zip_code)
+
+
+def get_cached_locations(zip_codes):
+    """
+    Return the unexpired ZipCache entries for a list of ZIP codes
+    as a dict of ZIP code -> (state, city).
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'ZIP_CACHE_TIMEOUT', 60 * 60 * 24 * 30))
+    locations = {}
+    for start in range(0, len(zip_codes), BULK_CREATE_BATCH_SIZE):
+        cached = ZipCache.objects.filter(
+            zip_code__in=zip_codes[start:start + BULK_CREATE_BATCH_SIZE], fetched_at__gte=cutoff
+        ).values_list('zip_code', 'state', 'city')
+        locations.update((zip_code, (state, city)) for zip_code, state, city in cached)
+    return locations
+
+
+def cache_locations(locations):
+    """
+    Store a dict of ZIP code -> (state, city) in ZipCache, replacing expired entries.
+    Each entry is a plain row insert; a concurrent worker caching the same
+    ZIP code first is ignored.
+    """
+    fetched_at = timezone.now()
+    entries = [
+        ZipCache(zip_code=zip_code, state=state, city=city, fetched_at=fetched_at)
+        for zip_code, (state, city) in locations.items()
+    ]
+    for start in range(0, len(entries), BULK_CREATE_BATCH_SIZE):
+        batch = entries[start:start + BULK_CREATE_BATCH_SIZE]
+        ZipCache.objects.filter(zip_code__in=[entry.zip_code for entry in batch]).delete()
+        ZipCache.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def wait_for_stable_size(path, settle_time=FILE_SETTLE_SECONDS):
+    """
+    Wait until a file stops growing so a CSV still being copied is not read early.
+    Returns False if the file disappears while waiting.
+    """
+    try:
+        size = path.stat().st_size
+        while True:
+            time.sleep(settle_time)
+            new_size = path.stat().st_size
+            if new_size == size:
+                return True
+            size = new_size
+    except FileNotFoundError:
+        return False
+
+
+class CSVFileHandler(FileSystemEventHandler):
+    """Watchdog handler that processes CSV files dropped into the incoming directory"""
+
+    def __init__(self, command):
+        super().__init__()
+        self.command = command
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.process_path(Path(event.src_path))
+
+    def on_moved(self, event):
+        # Files renamed into place (e.g. after an atomic upload) arrive as moves
+        if not event.is_directory:
+            self.process_path(Path(event.dest_path))
+
+    def process_path(self, csv_file_path):
+        if not csv_file_path.name.endswith('.csv') or csv_file_path.parent != Path(settings.CSV_INCOMING_DIR):
+            return
+        if not wait_for_stable_size(csv_file_path, FILE_SETTLE_SECONDS):
+            logger.debug('File %s disappeared before processing', csv_file_path)
+            return
+        # Events are handled on the observer thread, which owns its own DB connection
+        close_old_connections()
+        try:
+            self.command.process_single_csv(csv_file_path)
+        except Exception:
+            # An uncaught error would stop the observer thread and end watching
+            logger.exception('Unexpected error processing %s', csv_file_path)
+        finally:
+            close_old_connections()
+
+
 class Command(BaseCommand):
     help = 'Scans incoming folder for CSV files, processes them, and sends emails'
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Settings used on every row are read once instead of through LazySettings per call
+        self.from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com')
+        self.email_async = getattr(settings, 'CSV_EMAIL_ASYNC', False)
+        self.zip_api_max_workers = getattr(settings, 'ZIP_API_MAX_WORKERS', 32)
+        self.process_workers = getattr(settings, 'CSV_PROCESS_WORKERS', 1)
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--once',
@@ -52,8 +283,9 @@ class Command(BaseCommand):
         parser.add_argument(
             '--interval',
             type=int,
-            default=120,
-            help='Interval in seconds between scans (default: 120)',
+            default=None,
+            help='Poll the incoming folder every N seconds instead of watching it for '
+                 'filesystem events (for mounts that do not deliver events)',
         )
 
     def handle(self, *args, **options):
@@ -67,25 +299,47 @@ class Command(BaseCommand):
             logger.info('Starting single CSV scan')
             self.stdout.write(self.style.SUCCESS('Running single scan...'))
             self.process_csv_files()
-        else:
+        elif interval:
             logger.info('Starting continuous CSV scan with %d second interval', interval)
             self.stdout.write(self.style.SUCCESS(f'Starting continuous scan every {interval} seconds...'))
             while True:
                 self.process_csv_files()
                 time.sleep(interval)
+        else:
+            self.watch_incoming_directory()
+
+    def watch_incoming_directory(self):
+        """Process CSV files as soon as they are created in the incoming directory"""
+        incoming_dir = settings.CSV_INCOMING_DIR
+        logger.info('Watching %s for new CSV files', incoming_dir)
+        self.stdout.write(self.style.SUCCESS(f'Watching {incoming_dir} for new CSV files...'))
+        
+        observer = Observer()
+        observer.schedule(CSVFileHandler(self), str(incoming_dir), recursive=False)
+        observer.start()
+        try:
+            # Pick up files that arrived while the watcher was not running. The observer
+            # is started first so no file lands unnoticed between the scan and the start;
+            # a file seen by both is only processed by whichever claims it first.
+            self.process_csv_files()
+            observer.join()
+        finally:
+            observer.stop()
+            observer.join()
 
     def ensure_directories(self):
-        """Ensure incoming and processed directories exist"""
-        logger.debug('Ensuring directories exist: incoming=%s, processed=%s',
-                    settings.CSV_INCOMING_DIR, settings.CSV_PROCESSED_DIR)
+        """Ensure incoming, processed and failed directories exist"""
+        logger.debug('Ensuring directories exist: incoming=%s, processed=%s, failed=%s',
+                    settings.CSV_INCOMING_DIR, settings.CSV_PROCESSED_DIR, settings.CSV_FAILED_DIR)
         settings.CSV_INCOMING_DIR.mkdir(exist_ok=True)
         settings.CSV_PROCESSED_DIR.mkdir(exist_ok=True)
+        settings.CSV_FAILED_DIR.mkdir(exist_ok=True)
 
     def process_csv_files(self):
         """Process all CSV files in the incoming directory"""
         incoming_dir = settings.CSV_INCOMING_DIR
         
-        csv_files = list(incoming_dir.glob('*.csv'))
+        csv_files = self.scan_incoming_directory(incoming_dir)
         
         if not csv_files:
             logger.info('No CSV files found in %s', incoming_dir)
@@ -95,11 +349,62 @@ class Command(BaseCommand):
         logger.info('Found %d CSV file(s) to process in %s', len(csv_files), incoming_dir)
         self.stdout.write(self.style.SUCCESS(f'[{datetime.now()}] Found {len(csv_files)} CSV file(s) to process'))
         
-        for csv_file in csv_files:
-            self.process_single_csv(csv_file)
+        max_workers = min(self.process_workers, len(csv_files))
+        if max_workers <= 1:
+            for csv_file in csv_files:
+                self.process_single_csv(csv_file)
+            return
+        
+        self.process_files_in_parallel(csv_files, max_workers)
+
+    def process_files_in_parallel(self, csv_files, max_workers):
+        """
+        Process CSV files in a pool of worker processes, one file per task.
+        Each worker opens its own database connection, and the claim lock in
+        process_single_csv keeps two workers from processing the same file.
+        """
+        logger.debug('Processing %d CSV file(s) with up to %d worker processes',
+                    len(csv_files), max_workers)
+        # Workers must not inherit this process's open database connections
+        connections.close_all()
+        # Spawn rather than fork: watch mode runs the observer thread, and
+        # forking a threaded process can copy locks held by other threads
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context('spawn'),
+                                 initializer=init_worker) as executor:
+            futures = {
+                executor.submit(process_file, csv_file): csv_file
+                for csv_file in csv_files
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    # process_single_csv handles its own errors; this is a crashed worker
+                    logger.error('Worker failed processing %s: %s', futures[future].name, str(e))
+                    self.stdout.write(self.style.ERROR(
+                        f'Worker failed processing {futures[future].name}: {str(e)}'
+                    ))
+
+    def scan_incoming_directory(self, incoming_dir):
+        """
+        List the CSV files in the incoming directory.
+        os.scandir reads the file type from the directory entry, so no
+        per-file stat() is needed. Hidden files are skipped, as glob('*.csv') did.
+        """
+        with os.scandir(incoming_dir) as entries:
+            return [
+                Path(entry.path) for entry in entries
+                if entry.name.endswith('.csv') and not entry.name.startswith('.')
+                and entry.is_file(follow_symlinks=False)
+            ]
 
     def process_single_csv(self, csv_file_path):
         """Process a single CSV file"""
+        claimed_path = self.claim_file(csv_file_path)
+        if claimed_path is None:
+            logger.info('Skipping %s, already claimed by another worker', csv_file_path.name)
+            return
+        
         logger.info('Processing CSV file: %s', csv_file_path.name)
         self.stdout.write(f'Processing {csv_file_path.name}...')
         
@@ -113,54 +418,141 @@ class Command(BaseCommand):
         
         total_rows = 0
         successful_rows = 0
-        failed_rows = 0
+        pending = []
         
         try:
-            with open(csv_file_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
+            # First pass: read and validate all rows. Invalid rows are recorded in one
+            # transaction; nothing inside it waits on the network.
+            rows = []
+            with transaction.atomic():
+                self.relax_commit_durability()
                 
-                for row in reader:
+                for zip_code, email in self.read_csv_rows(claimed_path):
                     total_rows += 1
                     
-                    # Extract zip and email from CSV
-                    zip_code = row.get('zip', '').strip()
-                    email = row.get('email', '').strip()
-                    
                     if not zip_code or not email:
-                        failed_rows += 1
                         logger.warning('Row %d in %s has missing data: zip=%s, email=%s',
                                       total_rows, csv_file_path.name, 
                                       zip_code or 'MISSING', mask_email(email) if email else 'MISSING')
-                        logger.debug('Row %d missing data details: zip=%s, email=%s',
-                                    total_rows, zip_code or 'MISSING', email or 'MISSING')
-                        EmailRecord.objects.create(
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug('Row %d missing data details: zip=%s, email=%s',
+                                        total_rows, zip_code or 'MISSING', email or 'MISSING')
+                        pending.append(EmailRecord(
                             processing_record=record,
                             email_address=email or 'N/A',
                             zip_code=zip_code or 'N/A',
                             success=False,
                             error_message='Missing zip code or email'
-                        )
+                        ))
+                        if len(pending) >= BULK_CREATE_BATCH_SIZE:
+                            successful_rows += self.flush_email_records(pending)
                         continue
                     
-                    # Process the row
-                    success = self.process_row(record, zip_code, email)
-                    if success:
-                        successful_rows += 1
-                    else:
-                        failed_rows += 1
+                    if not (ZIP_RE.match(zip_code) and EMAIL_RE.match(email)):
+                        # Known-bad rows never reach the ZIP API
+                        logger.warning('Row %d in %s has invalid data: zip=%s, email=%s',
+                                      total_rows, csv_file_path.name, zip_code, mask_email(email))
+                        pending.append(EmailRecord(
+                            processing_record=record,
+                            email_address=email,
+                            zip_code=zip_code,
+                            success=False,
+                            error_message='Invalid zip code or email format'
+                        ))
+                        if len(pending) >= BULK_CREATE_BATCH_SIZE:
+                            successful_rows += self.flush_email_records(pending)
+                        continue
+                    
+                    rows.append((zip_code, email))
+                
+                successful_rows += self.flush_email_records(pending)
+            
+            # Second pass: resolve each distinct ZIP code once, concurrently. ZIP+4
+            # codes are resolved by their 5-digit prefix; records keep the full code.
+            zip_results = self.lookup_locations({zip_code[:5] for zip_code, email in rows})
+            
+            # Third pass: record the rows whose ZIP lookup failed. Queued emails
+            # (CSV_EMAIL_ASYNC) are recorded here too, and their tasks are only
+            # enqueued once the records holding the task ids are committed.
+            queue_errors = []
+            with transaction.atomic():
+                self.relax_commit_durability()
+                
+                for row_number, (zip_code, email) in enumerate(rows, 1):
+                    location = zip_results[zip_code[:5]]
+                    if self.email_async or isinstance(location, Exception):
+                        email_record, message = self.process_row(record, zip_code, email, location)
+                        if email_record.task_id:
+                            transaction.on_commit(
+                                partial(self.enqueue_location_email, email_record, queue_errors), robust=True
+                            )
+                        pending.append(email_record)
+                        if len(pending) >= BULK_CREATE_BATCH_SIZE:
+                            successful_rows += self.flush_email_records(pending)
+                    
+                    if self.email_async and row_number % PROGRESS_INTERVAL == 0:
+                        self.stdout.write(f'{csv_file_path.name}: {row_number}/{len(rows)} rows processed...')
+                
+                successful_rows += self.flush_email_records(pending)
+            
+            # Emails that could not be queued were marked failed after the commit
+            successful_rows -= len(queue_errors)
+            
+            # Fourth pass: send the remaining emails in batches over a single connection,
+            # outside any transaction. Each batch is recorded as soon as it is sent, so
+            # delivered emails keep their records if a later batch fails.
+            if not self.email_async and rows:
+                connection = mail.get_connection()
+                try:
+                    connection.open()
+                    connection_error = None
+                except Exception as e:
+                    # Record the error on each email, as per-row sending did, instead of failing the file
+                    logger.warning('Failed to open email connection for %s: %s', csv_file_path.name, str(e))
+                    connection_error = e
+                
+                try:
+                    outbox = []
+                    for row_number, (zip_code, email) in enumerate(rows, 1):
+                        location = zip_results[zip_code[:5]]
+                        if not isinstance(location, Exception):
+                            email_record, message = self.process_row(
+                                record, zip_code, email, connection_error or location, connection
+                            )
+                            if message is None:
+                                pending.append(email_record)
+                                if len(pending) >= BULK_CREATE_BATCH_SIZE:
+                                    successful_rows += self.flush_email_records(pending)
+                            else:
+                                outbox.append((message, email_record))
+                                if len(outbox) >= EMAIL_BATCH_SIZE:
+                                    successful_rows += self.flush_email_records(
+                                        self.send_email_batch(connection, outbox)
+                                    )
+                        
+                        if row_number % PROGRESS_INTERVAL == 0:
+                            self.stdout.write(f'{csv_file_path.name}: {row_number}/{len(rows)} rows processed...')
+                    
+                    successful_rows += self.flush_email_records(self.send_email_batch(connection, outbox))
+                    successful_rows += self.flush_email_records(pending)
+                finally:
+                    connection.close()
+            
+            failed_rows = total_rows - successful_rows
             
             # Update record
             record.total_rows = total_rows
             record.successful_rows = successful_rows
             record.failed_rows = failed_rows
             record.status = 'completed'
-            record.save()
+            record.save(update_fields=['total_rows', 'successful_rows', 'failed_rows', 'status'])
             
             logger.info('Completed processing %s: %d/%d rows successful, %d failed',
                        csv_file_path.name, successful_rows, total_rows, failed_rows)
             
             # Move to processed folder
-            self.move_to_processed(csv_file_path)
+            self.move_to_processed(claimed_path)
+            self.remove_claim_dir(claimed_path)
             
             self.stdout.write(self.style.SUCCESS(
                 f'Completed {csv_file_path.name}: {successful_rows}/{total_rows} successful'
@@ -169,113 +561,355 @@ class Command(BaseCommand):
         except Exception as e:
             logger.error('Error processing CSV file %s: %s', csv_file_path.name, str(e),
                         exc_info=True)
+            # Set the file aside rather than returning it to incoming, where it would
+            # be picked up and fail again in a loop
+            self.move_to_failed(claimed_path)
+            self.remove_claim_dir(claimed_path)
             record.status = 'failed'
-            record.save()
+            # Keep the counts in line with the email records committed before the error
+            counts = record.emails.aggregate(
+                total=Count('pk'), successful=Count('pk', filter=Q(success=True))
+            )
+            record.total_rows = counts['total']
+            record.successful_rows = counts['successful']
+            record.failed_rows = counts['total'] - counts['successful']
+            record.save(update_fields=['total_rows', 'successful_rows', 'failed_rows', 'status'])
             self.stdout.write(self.style.ERROR(f'Error processing {csv_file_path.name}: {str(e)}'))
 
-    def process_row(self, record, zip_code, email):
-        """Process a single row: fetch state from API and send email"""
+    def claim_file(self, csv_file_path):
+        """
+        Claim a CSV file for this worker by renaming it into a per-worker folder.
+        The rename is atomic, so when several workers race for the same file
+        exactly one succeeds. Returns the claimed path, or None if the file
+        was claimed by someone else first.
+        """
+        claim_dir = csv_file_path.parent / CLAIM_DIR_NAME / f'{socket.gethostname()}-{os.getpid()}'
+        claimed_path = claim_dir / csv_file_path.name
+        while True:
+            claim_dir.mkdir(parents=True, exist_ok=True)
+            try:
+                os.rename(csv_file_path, claimed_path)
+                return claimed_path
+            except FileNotFoundError:
+                if not csv_file_path.exists():
+                    return None
+                # Another thread of this worker removed the emptied claim folder; recreate it
+
+    def remove_claim_dir(self, claimed_path):
+        """Remove this worker's claim folder once it no longer holds any file"""
         try:
-            logger.debug('Processing row: email=%s, zip=%s', email, zip_code)
+            claimed_path.parent.rmdir()
+        except OSError:
+            # Another thread of this worker still has a file claimed
+            pass
+
+    def read_csv_rows(self, csv_file_path):
+        """
+        Yield the stripped (zip, email) values of each non-blank CSV row.
+        Rows too short to hold both columns yield empty values. Large files
+        are parsed with pyarrow when it is installed.
+        """
+        if pacsv is not None and csv_file_path.stat().st_size >= ARROW_MIN_FILE_SIZE:
+            yield from self.read_csv_rows_arrow(csv_file_path)
+            return
+        
+        with open(csv_file_path, 'r', encoding='utf-8', newline='',
+                  buffering=CSV_READ_BUFFER_SIZE) as csvfile:
+            reader = csv.reader(csvfile)
+            header = next(reader, [])
+            zip_index, email_index = self.get_column_indexes(header)
+            row_length = max(zip_index, email_index) + 1
             
-            # Call ZIP API
-            state, city = self.get_location_from_zip(zip_code)
+            for row in reader:
+                if not row:
+                    # Skip blank lines
+                    continue
+                if len(row) >= row_length:
+                    yield row[zip_index].strip(), row[email_index].strip()
+                else:
+                    yield '', ''
+    
+    def read_csv_rows_arrow(self, csv_file_path):
+        """
+        Yield the stripped (zip, email) values of a CSV file one record batch
+        at a time using pyarrow's native parser. Rows pyarrow rejects for having
+        the wrong number of columns are parsed with the csv module instead, so
+        they yield the same values as in read_csv_rows.
+        """
+        with open(csv_file_path, 'r', encoding='utf-8', newline='') as csvfile:
+            header = next(csv.reader(csvfile), [])
+        zip_index, email_index = self.get_column_indexes(header)
+        row_length = max(zip_index, email_index) + 1
+        invalid_rows = []
+        
+        def collect_invalid_row(invalid_row):
+            invalid_rows.append(invalid_row.text)
+            return 'skip'
+        
+        def parse_invalid_rows():
+            for row in csv.reader(invalid_rows):
+                if len(row) >= row_length:
+                    yield row[zip_index].strip(), row[email_index].strip()
+                else:
+                    yield '', ''
+            invalid_rows.clear()
+        
+        reader = pacsv.open_csv(
+            str(csv_file_path),
+            read_options=pacsv.ReadOptions(block_size=CSV_READ_BUFFER_SIZE),
+            parse_options=pacsv.ParseOptions(invalid_row_handler=collect_invalid_row),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=['zip', 'email'],
+                column_types={'zip': pa.string(), 'email': pa.string()},
+            ),
+        )
+        for batch in reader:
+            yield from parse_invalid_rows()
+            zip_codes = batch.column('zip').to_pylist()
+            emails = batch.column('email').to_pylist()
+            for zip_code, email in zip(zip_codes, emails):
+                yield (zip_code or '').strip(), (email or '').strip()
+        yield from parse_invalid_rows()
+    
+    def get_column_indexes(self, header):
+        """Return the positions of the zip and email columns in a CSV header row"""
+        if not header:
+            # An empty file has no rows to process
+            return 0, 1
+        try:
+            return header.index('zip'), header.index('email')
+        except ValueError:
+            raise ValueError(f'CSV header must contain zip and email columns, found: {", ".join(header)}')
+
+    def relax_commit_durability(self):
+        """
+        Skip waiting for the WAL flush when the current import transaction commits.
+        Only applies to PostgreSQL. A server crash right after commit can lose
+        the most recent import, an acceptable tradeoff for import jobs.
+        """
+        db_connection = transaction.get_connection()
+        if db_connection.vendor == 'postgresql':
+            with db_connection.cursor() as cursor:
+                cursor.execute('SET LOCAL synchronous_commit = OFF')
+
+    def flush_email_records(self, pending):
+        """
+        Write buffered EmailRecord instances in one batch and clear the buffer.
+        Returns the number of successful records written.
+        """
+        if not pending:
+            return 0
+        logger.debug('Writing %d email record(s) to the database', len(pending))
+        if bulk_insert_models is not None and transaction.get_connection().vendor == 'postgresql':
+            # COPY bypasses the ORM's insert path, so stamp auto_now_add explicitly
+            processed_at = timezone.now()
+            for email_record in pending:
+                email_record.processed_at = processed_at
+            bulk_insert_models(pending)
+        else:
+            EmailRecord.objects.bulk_create(pending, batch_size=BULK_CREATE_BATCH_SIZE)
+        successful = sum(1 for email_record in pending if email_record.success)
+        pending.clear()
+        return successful
+
+    def lookup_locations(self, zip_codes):
+        """
+        Resolve the (state, city) of each distinct 5-digit ZIP code.
+        ZIP codes in the local dataset or in ZipCache are resolved directly;
+        the rest are looked up concurrently with a thread pool and added to
+        ZipCache. The cache is read and written here, in bulk, so the lookup
+        threads never touch the database.
+        Returns a dict mapping every ZIP code to either a (state, city) tuple
+        or the exception raised by the lookup.
+        """
+        zip_table = load_zip_table(getattr(settings, 'ZIP_DATA_FILE', None))
+        zip_results = {zip_code: zip_table.get(zip_code[:5]) for zip_code in zip_codes}
+        zip_results.update(get_cached_locations(
+            [zip_code for zip_code, location in zip_results.items() if location is None]
+        ))
+        to_fetch = [zip_code for zip_code, location in zip_results.items() if location is None]
+        if not to_fetch:
+            return zip_results
+        max_workers = self.zip_api_max_workers
+        
+        logger.debug('Looking up %d of %d distinct ZIP code(s) with up to %d workers',
+                    len(to_fetch), len(zip_results), max_workers)
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(to_fetch))) as executor:
+            futures = {
+                executor.submit(self.get_location_from_zip, zip_code): zip_code
+                for zip_code in to_fetch
+            }
+            for future in as_completed(futures):
+                zip_code = futures[future]
+                try:
+                    zip_results[zip_code] = future.result()
+                except Exception as e:
+                    zip_results[zip_code] = e
+        
+        cache_locations({
+            zip_code: zip_results[zip_code] for zip_code in to_fetch
+            if not isinstance(zip_results[zip_code], Exception)
+        })
+        return zip_results
+
+    def process_row(self, record, zip_code, email, location, connection=None):
+        """
+        Process a single row: build the email for the resolved location.
+        location is the (state, city) tuple returned by the ZIP API, or the
+        exception raised while fetching it.
+        Returns an unsaved EmailRecord and the EmailMessage to send over the
+        shared connection, which is None when the row failed or the email is
+        to be queued for a Celery worker (CSV_EMAIL_ASYNC).
+        """
+        try:
+            if isinstance(location, Exception):
+                raise location
+            state, city = location
             
-            # Send email
-            self.send_email_to_address(email, zip_code, state, city)
+            if self.email_async:
+                # Hand delivery to a Celery worker once the record is committed
+                # (enqueue_location_email); the task id links it back to the record
+                task_id = str(uuid.uuid4())
+                message = None
+            else:
+                task_id = None
+                message = build_location_email(email, zip_code, state, city, connection, self.from_email)
             
-            # Record success
-            EmailRecord.objects.create(
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug('Successfully processed row: email=%s, zip=%s, state=%s, city=%s',
+                            email, zip_code, state, city)
+            # Record success; delivery failures are recorded by send_email_batch
+            # or by the email task
+            email_record = EmailRecord(
                 processing_record=record,
                 email_address=email,
                 zip_code=zip_code,
                 state=state,
                 city=city,
-                success=True
+                success=True,
+                task_id=task_id
             )
-            
-            logger.debug('Successfully processed row: email=%s, zip=%s, state=%s, city=%s',
-                        email, zip_code, state, city)
-            return True
+            return email_record, message
             
         except Exception as e:
             logger.warning('Failed to process row: email=%s, zip=%s, error=%s',
                           mask_email(email), zip_code, str(e))
-            logger.debug('Failed to process row details: email=%s, zip=%s, error=%s',
-                        email, zip_code, str(e))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug('Failed to process row details: email=%s, zip=%s, error=%s',
+                            email, zip_code, str(e))
             # Record failure
-            EmailRecord.objects.create(
+            email_record = EmailRecord(
                 processing_record=record,
                 email_address=email,
                 zip_code=zip_code,
                 success=False,
                 error_message=str(e)
             )
-            self.stdout.write(self.style.WARNING(f'Failed to process {mask_email(email)}: {str(e)}'))
-            return False
+            return email_record, None
 
-    def get_location_from_zip(self, zip_code):
-        """Fetch state and city information from ZIP code API"""
-        url = settings.ZIP_API_URL.format(zip=zip_code)
-        timeout = getattr(settings, 'ZIP_API_TIMEOUT', 5)
-        
+    def enqueue_location_email(self, email_record, queue_errors):
+        """
+        Queue the email of a committed EmailRecord for a Celery worker.
+        Runs after the commit, so a broker error marks only this record as
+        failed instead of failing the file. The error is added to queue_errors.
+        """
         try:
-            logger.debug('Calling ZIP API for zip=%s, url=%s', zip_code, url)
-            response = requests.get(url, timeout=timeout)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # Extract state and city from response
-            if 'places' in data and len(data['places']) > 0:
-                place = data['places'][0]
-                state = place.get('state', 'Unknown')
-                city = place.get('place name', 'Unknown')
-                logger.debug('ZIP API returned: zip=%s, state=%s, city=%s',
-                            zip_code, state, city)
-                return state, city
-            else:
-                logger.warning('ZIP API returned no places for zip=%s', zip_code)
-                return 'Unknown', 'Unknown'
-                
-        except requests.RequestException as e:
-            logger.error('ZIP API request failed for zip=%s: %s', zip_code, str(e))
-            raise Exception(f'API error for ZIP {zip_code}: {str(e)}')
-
-    def send_email_to_address(self, email, zip_code, state, city):
-        """Send email using Django's email backend"""
-        subject = f'Location Information for ZIP {zip_code}'
-        message = f'''
-Hello,
-
-Here is the location information for ZIP code {zip_code}:
+            send_location_email.apply_async(
+                (email_record.email_address, email_record.zip_code, email_record.state, email_record.city),
+                task_id=email_record.task_id
+            )
+        except Exception as e:
+            logger.warning('Failed to queue email to %s: %s', mask_email(email_record.email_address), str(e))
+            EmailRecord.objects.filter(task_id=email_record.task_id).update(
+                success=False, error_message=f'Failed to queue email: {e}'
+            )
+            queue_errors.append(e)
 
-City: {city}
-State: {state}
+    def get_location_from_zip(self, zip_code):
+        """Fetch state and city information for a ZIP code, using the local dataset when available"""
+        return lookup_zip(zip_code)
 
-Thank you!
-'''
-        from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com')
+    def send_email_batch(self, connection, outbox):
+        """
+        Send buffered (EmailMessage, EmailRecord) pairs over an open connection
+        and clear the buffer. Messages are handed to the backend one at a time:
+        it stops at the first failure of a multi-message call, after the earlier
+        messages were delivered, so only per-message calls tell which emails
+        failed. Failed emails have their records marked as failed.
+        Returns the EmailRecords of the batch.
+        """
+        if not outbox:
+            return []
+        email_records = [email_record for message, email_record in outbox]
         
-        logger.debug('Sending email to %s with subject: %s', email, subject)
-        send_mail(
-            subject,
-            message,
-            from_email,
-            [email],
-            fail_silently=False,
-        )
-        logger.info('Email sent successfully to %s for ZIP %s', mask_email(email), zip_code)
-        logger.debug('Email sent to %s for ZIP %s', email, zip_code)
+        logger.debug('Sending batch of %d email(s)', len(outbox))
+        failed = 0
+        for message, email_record in outbox:
+            try:
+                if not connection.send_messages([message]):
+                    raise Exception('Email backend did not send the message')
+                logger.info('Email sent successfully to %s for ZIP %s',
+                           mask_email(email_record.email_address), email_record.zip_code)
+            except Exception as e:
+                logger.warning('Failed to send email to %s: %s',
+                              mask_email(email_record.email_address), str(e))
+                email_record.success = False
+                email_record.error_message = str(e)
+                failed += 1
+        
+        if failed:
+            self.stdout.write(self.style.WARNING(f'Failed to send {failed} of {len(outbox)} email(s)'))
+        outbox.clear()
+        return email_records
 
     def move_to_processed(self, csv_file_path):
         """Move processed CSV file to processed directory"""
-        processed_dir = settings.CSV_PROCESSED_DIR
-        
-        # Add timestamp to filename to avoid conflicts
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        new_filename = f"{csv_file_path.stem}_{timestamp}{csv_file_path.suffix}"
-        
-        destination = processed_dir / new_filename
-        logger.info('Moving processed file from %s to %s', csv_file_path, destination)
-        shutil.move(str(csv_file_path), str(destination))
+        destination = self.move_without_overwrite(csv_file_path, settings.CSV_PROCESSED_DIR)
+        logger.info('Moved processed file from %s to %s', csv_file_path, destination)
+
+    def move_to_failed(self, csv_file_path):
+        """Move a CSV file that could not be processed to the failed directory"""
+        destination = self.move_without_overwrite(csv_file_path, settings.CSV_FAILED_DIR)
+        logger.info('Moved failed file from %s to %s', csv_file_path, destination)
+
+    def move_without_overwrite(self, csv_file_path, directory):
+        """
+        Move a CSV file into a directory, never replacing a file already there.
+        The file keeps its name when it is free; otherwise a timestamp, and if
+        needed a counter, is added. Returns the destination path.
+        """
+        destination = directory / csv_file_path.name
+        attempt = 0
+        while True:
+            try:
+                self.create_exclusively(csv_file_path, destination)
+                break
+            except FileExistsError:
+                # Add timestamp to filename to avoid conflicts
+                attempt += 1
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                suffix = f'_{timestamp}' if attempt == 1 else f'_{timestamp}_{attempt}'
+                destination = directory / f'{csv_file_path.stem}{suffix}{csv_file_path.suffix}'
+        os.unlink(csv_file_path)
+        return destination
+
+    def create_exclusively(self, source, destination):
+        """
+        Create destination with the contents of source, raising FileExistsError
+        if destination exists. Unlike os.replace this cannot overwrite a file
+        placed by another worker between a check and the move.
+        """
+        try:
+            # A hard link is created atomically and only if the name is free
+            os.link(source, destination)
+        except OSError as e:
+            if e.errno not in LINK_UNSUPPORTED_ERRNOS:
+                raise
+            logger.debug('Cannot hard link %s (%s), copying it', source, e.strerror)
+            with open(source, 'rb') as src, open(destination, 'xb') as dst:
+                try:
+                    shutil.copyfileobj(src, dst)
+                except BaseException:
+                    os.unlink(destination)
+                    raise
+            shutil.copystat(source, destination)
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-15 15:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('csv_processor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='csvprocessingrecord',
+            index=models.Index(fields=['status', '-processed_at'], name='csv_process_status_52a9e9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailrecord',
+            index=models.Index(fields=['processing_record', '-processed_at'], name='csv_process_process_08c37b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailrecord',
+            index=models.Index(fields=['success'], name='csv_process_success_2d247a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailrecord',
+            index=models.Index(fields=['zip_code'], name='csv_process_zip_cod_f41b54_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailrecord',
+            index=models.Index(fields=['state'], name='csv_process_state_9cded4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailrecord',
+            index=models.Index(condition=models.Q(('success', False)), fields=['processing_record'], name='failed_rows_idx'),
+        ),
+    ]
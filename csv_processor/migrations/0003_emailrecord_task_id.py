@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-15 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('csv_processor', '0002_add_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailrecord',
+            name='task_id',
+            field=models.CharField(blank=True, db_index=True, max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-15 15:33
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('csv_processor', '0003_emailrecord_task_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZipCache',
+            fields=[
+                ('zip_code', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('state', models.CharField(max_length=100)),
+                ('city', models.CharField(max_length=100)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CSVProcessingRecord(models.Model):
@@ -12,6 +13,9 @@ class CSVProcessingRecord(models.Model):
     
     class Meta:
         ordering = ['-processed_at']
+        indexes = [
+            models.Index(fields=['status', '-processed_at']),
+        ]
     
     def __str__(self):
         return f"{self.filename} - {self.processed_at}"
@@ -27,10 +31,30 @@ class EmailRecord(models.Model):
     processed_at = models.DateTimeField(auto_now_add=True)
     success = models.BooleanField(default=False)
     error_message = models.TextField(blank=True, null=True)
+    task_id = models.CharField(max_length=255, blank=True, null=True, db_index=True)  # Celery task sending the email
     
     class Meta:
         ordering = ['-processed_at']
+        indexes = [
+            models.Index(fields=['processing_record', '-processed_at']),
+            models.Index(fields=['success']),
+            models.Index(fields=['zip_code']),
+            models.Index(fields=['state']),
+            # Partial index for the common "show failures of this file" query
+            models.Index(fields=['processing_record'], condition=models.Q(success=False),
+                         name='failed_rows_idx'),
+        ]
     
     def __str__(self):
         return f"{self.email_address} - {self.zip_code}"
 
+
+class ZipCache(models.Model):
+    """ZIP API result, reused across runs until ZIP_CACHE_TIMEOUT expires"""
+    zip_code = models.CharField(max_length=10, primary_key=True)
+    state = models.CharField(max_length=100)
+    city = models.CharField(max_length=100)
+    fetched_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.zip_code} - {self.city}, {self.state}"
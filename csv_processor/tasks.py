@@ -0,0 +1,46 @@
+import logging
+
+from celery import shared_task
+
+from csv_processor.emails import build_location_email
+from csv_processor.models import EmailRecord
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def send_location_email(self, email, zip_code, state, city):
+    """
+    Send the location email for one CSV row from a Celery worker.
+    Delivery is retried; once retries are exhausted the EmailRecord holding
+    this task's id is marked as failed.
+    """
+    try:
+        build_location_email(email, zip_code, state, city).send(fail_silently=False)
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            logger.warning('Email task %s for ZIP %s failed, retrying: %s', self.request.id, zip_code, str(e))
+            raise self.retry(exc=e)
+        logger.error('Email task %s for ZIP %s failed after %d retries: %s',
+                    self.request.id, zip_code, self.request.retries, str(e))
+        EmailRecord.objects.filter(task_id=self.request.id).update(success=False, error_message=str(e))
+        raise
+    logger.info('Email task %s sent location email for ZIP %s', self.request.id, zip_code)
+
+
+@shared_task
+def scan_csv_dir():
+    """
+    Process the CSV files currently in the incoming folder.
+    Scheduled by Celery beat (CELERY_BEAT_SCHEDULE); files are claimed before
+    processing, so several workers can run the scan at the same time.
+    """
+    # Imported here because the command module imports this one
+    from csv_processor.management.commands.process_csv import Command
+    
+    command = Command()
+    # Celery's prefork workers are daemonic and cannot start worker processes
+    command.process_workers = 1
+    command.ensure_directories()
+    command.process_csv_files()
@@ -1,15 +1,32 @@
 import csv
+import errno
 import os
 import shutil
 import tempfile
+from concurrent.futures import Future
+from datetime import timedelta
+from io import StringIO
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest import skipUnless
+from unittest.mock import ANY, Mock, patch
 
+import requests
+from django.contrib import admin
+from django.core import mail
 from django.core.management import call_command
-from django.test import TestCase, override_settings
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from watchdog.events import FileCreatedEvent, FileMovedEvent
 
-from .models import CSVProcessingRecord, EmailRecord
-from .management.commands.process_csv import mask_email
+from .admin import CSVProcessingRecordAdmin, EmailRecordAdmin
+from .models import CSVProcessingRecord, EmailRecord, ZipCache
+from .tasks import scan_csv_dir, send_location_email
+from .workers import init_worker
+from .management.commands.process_csv import (
+    CSVFileHandler, Command, load_zip_table, mask_email, pacsv
+)
 
 
 class CSVProcessingRecordModelTest(TestCase):
@@ -68,8 +85,13 @@ class ProcessCSVCommandTest(TestCase):
         self.test_dir = tempfile.mkdtemp()
         self.incoming_dir = Path(self.test_dir) / 'incoming'
         self.processed_dir = Path(self.test_dir) / 'processed'
+        self.failed_dir = Path(self.test_dir) / 'failed'
         self.incoming_dir.mkdir()
         self.processed_dir.mkdir()
+        self.failed_dir.mkdir()
+        failed_dir_override = override_settings(CSV_FAILED_DIR=self.failed_dir)
+        failed_dir_override.enable()
+        self.addCleanup(failed_dir_override.disable)
 
     def tearDown(self):
         # Clean up temporary directories
@@ -89,8 +111,7 @@ class ProcessCSVCommandTest(TestCase):
         CSV_PROCESSED_DIR=None  # Will be set in test
     )
     @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
-    @patch('csv_processor.management.commands.process_csv.send_mail')
-    def test_process_single_csv(self, mock_send_mail, mock_get_location):
+    def test_process_single_csv(self, mock_get_location):
         # Setup
         from django.conf import settings
         settings.CSV_INCOMING_DIR = self.incoming_dir
@@ -119,21 +140,22 @@ class ProcessCSVCommandTest(TestCase):
         # Check email records
         self.assertEqual(EmailRecord.objects.count(), 2)
 
-        # Check that send_mail was called
-        self.assertEqual(mock_send_mail.call_count, 2)
+        # Check that both emails were sent
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].to, ['test1@example.com'])
+        self.assertEqual(mail.outbox[0].from_email, 'noreply@example.com')
 
         # Check that CSV was moved to processed
         self.assertFalse((self.incoming_dir / 'test.csv').exists())
-        processed_files = list(self.processed_dir.glob('test_*.csv'))
-        self.assertEqual(len(processed_files), 1)
+        self.assertTrue((self.processed_dir / 'test.csv').exists())
+        self.assertEqual(list((self.incoming_dir / '.claimed').iterdir()), [])
 
     @override_settings(
         CSV_INCOMING_DIR=None,
         CSV_PROCESSED_DIR=None
     )
     @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
-    @patch('csv_processor.management.commands.process_csv.send_mail')
-    def test_process_csv_with_missing_data(self, mock_send_mail, mock_get_location):
+    def test_process_csv_with_missing_data(self, mock_get_location):
         # Setup
         from django.conf import settings
         settings.CSV_INCOMING_DIR = self.incoming_dir
@@ -164,8 +186,7 @@ class ProcessCSVCommandTest(TestCase):
         CSV_PROCESSED_DIR=None
     )
     @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
-    @patch('csv_processor.management.commands.process_csv.send_mail')
-    def test_api_error_handling(self, mock_send_mail, mock_get_location):
+    def test_api_error_handling(self, mock_get_location):
         # Setup
         from django.conf import settings
         settings.CSV_INCOMING_DIR = self.incoming_dir
@@ -188,6 +209,659 @@ class ProcessCSVCommandTest(TestCase):
         self.assertFalse(email_record.success)
         self.assertIn('API Error', email_record.error_message)
 
+    @override_settings(
+        CSV_INCOMING_DIR=None,
+        CSV_PROCESSED_DIR=None
+    )
+    @patch('csv_processor.management.commands.process_csv.BULK_CREATE_BATCH_SIZE', 2)
+    @patch('csv_processor.management.commands.process_csv.EMAIL_BATCH_SIZE', 2)
+    @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
+    def test_email_records_written_in_batches(self, mock_get_location):
+        # Setup
+        from django.conf import settings
+        settings.CSV_INCOMING_DIR = self.incoming_dir
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        mock_get_location.return_value = ('California', 'Beverly Hills')
+
+        # Five rows with batch sizes of two: the missing row is written with the
+        # invalid rows, then each batch of two emails is written once it is sent
+        test_data = [
+            {'zip': '90210', 'email': f'test{i}@example.com'} for i in range(4)
+        ] + [{'zip': '', 'email': 'test4@example.com'}]
+        self.create_test_csv('test.csv', test_data)
+
+        # Run command
+        with patch.object(EmailRecord.objects, 'bulk_create',
+                          wraps=EmailRecord.objects.bulk_create) as mock_bulk_create:
+            call_command('process_csv', '--once')
+
+        # Verify
+        self.assertEqual(mock_bulk_create.call_count, 3)
+        self.assertEqual(EmailRecord.objects.count(), 5)
+        self.assertEqual(EmailRecord.objects.filter(success=True).count(), 4)
+        record = CSVProcessingRecord.objects.first()
+        self.assertEqual(record.successful_rows, 4)
+        self.assertEqual(record.failed_rows, 1)
+
+    @override_settings(
+        CSV_INCOMING_DIR=None,
+        CSV_PROCESSED_DIR=None
+    )
+    @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
+    def test_repeated_zip_looked_up_once(self, mock_get_location):
+        # Setup
+        from django.conf import settings
+        settings.CSV_INCOMING_DIR = self.incoming_dir
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        mock_get_location.return_value = ('California', 'Beverly Hills')
+
+        # Create test CSV where one ZIP code repeats
+        test_data = [
+            {'zip': '90210', 'email': 'test1@example.com'},
+            {'zip': '90210', 'email': 'test2@example.com'},
+            {'zip': '90210', 'email': 'test3@example.com'},
+        ]
+        self.create_test_csv('test.csv', test_data)
+
+        # Run command
+        call_command('process_csv', '--once')
+
+        # Verify the API was called once but every row was processed
+        mock_get_location.assert_called_once_with('90210')
+        self.assertEqual(EmailRecord.objects.filter(success=True).count(), 3)
+
+    @override_settings(
+        CSV_INCOMING_DIR=None,
+        CSV_PROCESSED_DIR=None
+    )
+    @patch('csv_processor.management.commands.process_csv.EMAIL_BATCH_SIZE', 2)
+    @patch('django.core.mail.backends.locmem.EmailBackend.send_messages')
+    @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
+    def test_email_send_failure_marks_only_that_email(self, mock_get_location, mock_send_messages):
+        # Setup
+        from django.conf import settings
+        settings.CSV_INCOMING_DIR = self.incoming_dir
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        mock_get_location.return_value = ('California', 'Beverly Hills')
+        # The second email fails; the ones around it are delivered
+        mock_send_messages.side_effect = [1, Exception('SMTP Error'), 1]
+
+        # Create test CSV with two batches of emails
+        test_data = [
+            {'zip': '90210', 'email': f'test{i}@example.com'} for i in range(3)
+        ]
+        self.create_test_csv('test.csv', test_data)
+
+        # Run command
+        call_command('process_csv', '--once')
+
+        # Verify each email went over the connection and only the failed one was marked
+        self.assertEqual(mock_send_messages.call_count, 3)
+        record = CSVProcessingRecord.objects.first()
+        self.assertEqual(record.successful_rows, 2)
+        self.assertEqual(record.failed_rows, 1)
+        failed_record = EmailRecord.objects.get(success=False)
+        self.assertEqual(failed_record.email_address, 'test1@example.com')
+        self.assertIn('SMTP Error', failed_record.error_message)
+
+    @override_settings(
+        CSV_INCOMING_DIR=None,
+        CSV_PROCESSED_DIR=None
+    )
+    @patch('django.core.mail.backends.locmem.EmailBackend.open')
+    @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
+    def test_email_connection_failure_recorded_per_row(self, mock_get_location, mock_open):
+        # Setup
+        from django.conf import settings
+        settings.CSV_INCOMING_DIR = self.incoming_dir
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        mock_get_location.return_value = ('California', 'Beverly Hills')
+        mock_open.side_effect = ConnectionRefusedError('Connection refused')
+
+        # Create test CSV
+        test_data = [
+            {'zip': '90210', 'email': f'test{i}@example.com'} for i in range(2)
+        ]
+        self.create_test_csv('test.csv', test_data)
+
+        # Run command
+        call_command('process_csv', '--once')
+
+        # Verify the file completes with every email recorded as failed
+        record = CSVProcessingRecord.objects.get()
+        self.assertEqual(record.status, 'completed')
+        self.assertEqual(record.failed_rows, 2)
+        self.assertEqual(len(mail.outbox), 0)
+        for email_record in EmailRecord.objects.all():
+            self.assertFalse(email_record.success)
+            self.assertIn('Connection refused', email_record.error_message)
+
+    @override_settings(
+        CSV_INCOMING_DIR=None,
+        CSV_PROCESSED_DIR=None
+    )
+    @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
+    def test_invalid_rows_skip_api(self, mock_get_location):
+        # Setup
+        from django.conf import settings
+        settings.CSV_INCOMING_DIR = self.incoming_dir
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        mock_get_location.return_value = ('California', 'Beverly Hills')
+
+        # Create test CSV with malformed ZIP codes and email addresses
+        test_data = [
+            {'zip': '90210-1234', 'email': 'test1@example.com'},
+            {'zip': 'ABCDE', 'email': 'test2@example.com'},
+            {'zip': '1234', 'email': 'test3@example.com'},
+            {'zip': '10001', 'email': 'not-an-email'},
+        ]
+        self.create_test_csv('test.csv', test_data)
+
+        # Run command
+        call_command('process_csv', '--once')
+
+        # Verify only the valid row was looked up and the others were recorded as invalid
+        mock_get_location.assert_called_once_with('90210')
+        self.assertTrue(EmailRecord.objects.filter(zip_code='90210-1234', success=True).exists())
+        self.assertEqual(ZipCache.objects.get().zip_code, '90210')
+        record = CSVProcessingRecord.objects.first()
+        self.assertEqual(record.successful_rows, 1)
+        self.assertEqual(record.failed_rows, 3)
+        self.assertEqual(
+            EmailRecord.objects.filter(error_message='Invalid zip code or email format').count(), 3
+        )
+
+    @override_settings(
+        CSV_INCOMING_DIR=None,
+        CSV_PROCESSED_DIR=None
+    )
+    @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
+    def test_blank_and_short_rows(self, mock_get_location):
+        # Setup
+        from django.conf import settings
+        settings.CSV_INCOMING_DIR = self.incoming_dir
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        mock_get_location.return_value = ('California', 'Beverly Hills')
+
+        # Columns in a different order, a blank line and a row missing its email column
+        csv_path = self.incoming_dir / 'test.csv'
+        csv_path.write_text('email,zip\ntest1@example.com,90210\n\ntest2@example.com\n', encoding='utf-8')
+
+        # Run command
+        call_command('process_csv', '--once')
+
+        # Verify the blank line is skipped and the short row is recorded as missing data
+        record = CSVProcessingRecord.objects.first()
+        self.assertEqual(record.total_rows, 2)
+        self.assertEqual(record.successful_rows, 1)
+        self.assertEqual(record.failed_rows, 1)
+        mock_get_location.assert_called_once_with('90210')
+
+    @skipUnless(pacsv, 'pyarrow is not installed')
+    @override_settings(
+        CSV_INCOMING_DIR=None,
+        CSV_PROCESSED_DIR=None
+    )
+    @patch('csv_processor.management.commands.process_csv.ARROW_MIN_FILE_SIZE', 0)
+    @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
+    def test_large_file_read_with_pyarrow(self, mock_get_location):
+        # Setup
+        from django.conf import settings
+        settings.CSV_INCOMING_DIR = self.incoming_dir
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        mock_get_location.return_value = ('California', 'Beverly Hills')
+
+        # Extra column, padded values, a blank line, a short row and a long row
+        csv_path = self.incoming_dir / 'test.csv'
+        csv_path.write_text(
+            'name,email,zip\nA, test1@example.com ,90210\n\nB,test2@example.com\nC,,10001\n'
+            'D,test4@example.com,90210,extra\n',
+            encoding='utf-8'
+        )
+
+        # Verify both readers yield the same rows
+        with patch('csv_processor.management.commands.process_csv.ARROW_MIN_FILE_SIZE', 1 << 30):
+            csv_rows = list(Command().read_csv_rows(csv_path))
+        self.assertEqual(sorted(Command().read_csv_rows(csv_path)), sorted(csv_rows))
+
+        # Run command
+        call_command('process_csv', '--once')
+
+        # Verify rows with the wrong number of columns are counted as with the csv module
+        record = CSVProcessingRecord.objects.first()
+        self.assertEqual(record.status, 'completed')
+        self.assertEqual(record.total_rows, 4)
+        self.assertEqual(record.successful_rows, 2)
+        self.assertEqual(record.failed_rows, 2)
+        self.assertEqual(EmailRecord.objects.filter(error_message='Missing zip code or email').count(), 2)
+        mock_get_location.assert_called_once_with('90210')
+
+    @override_settings(
+        CSV_INCOMING_DIR=None,
+        CSV_PROCESSED_DIR=None
+    )
+    def test_missing_required_column(self):
+        # Setup
+        from django.conf import settings
+        settings.CSV_INCOMING_DIR = self.incoming_dir
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        csv_path = self.incoming_dir / 'test.csv'
+        csv_path.write_text('zip,name\n90210,Test\n', encoding='utf-8')
+
+        # Run command
+        call_command('process_csv', '--once')
+
+        # Verify the file is marked failed and set aside instead of being retried
+        record = CSVProcessingRecord.objects.first()
+        self.assertEqual(record.status, 'failed')
+        self.assertEqual(EmailRecord.objects.count(), 0)
+        self.assertFalse(csv_path.exists())
+        self.assertTrue((self.failed_dir / 'test.csv').exists())
+
+        # A later scan finds nothing to process, and no claim folder is left behind
+        call_command('process_csv', '--once')
+        self.assertEqual(CSVProcessingRecord.objects.count(), 1)
+        self.assertEqual(list((self.incoming_dir / '.claimed').iterdir()), [])
+
+    @override_settings(
+        CSV_INCOMING_DIR=None,
+        CSV_PROCESSED_DIR=None
+    )
+    @patch('csv_processor.management.commands.process_csv.PROGRESS_INTERVAL', 2)
+    @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
+    def test_progress_reported_every_interval(self, mock_get_location):
+        # Setup
+        from django.conf import settings
+        settings.CSV_INCOMING_DIR = self.incoming_dir
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        mock_get_location.side_effect = Exception('API Error')
+
+        # Create test CSV
+        test_data = [
+            {'zip': '90210', 'email': f'test{i}@example.com'} for i in range(5)
+        ]
+        self.create_test_csv('test.csv', test_data)
+
+        # Run command
+        out = StringIO()
+        call_command('process_csv', '--once', stdout=out)
+
+        # Verify progress is reported periodically rather than once per failed row
+        output = out.getvalue()
+        self.assertIn('test.csv: 2/5 rows processed', output)
+        self.assertIn('test.csv: 4/5 rows processed', output)
+        self.assertNotIn('Failed to process', output)
+
+    @override_settings(
+        CSV_INCOMING_DIR=None,
+        CSV_PROCESSED_DIR=None,
+        CSV_EMAIL_ASYNC=True
+    )
+    @patch('csv_processor.management.commands.process_csv.mail.get_connection')
+    @patch('csv_processor.management.commands.process_csv.send_location_email')
+    @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
+    def test_async_email_queues_task(self, mock_get_location, mock_task, mock_get_connection):
+        # Setup
+        from django.conf import settings
+        settings.CSV_INCOMING_DIR = self.incoming_dir
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        mock_get_location.return_value = ('California', 'Beverly Hills')
+
+        # Create test CSV
+        test_data = [
+            {'zip': '90210', 'email': 'test1@example.com'},
+        ]
+        self.create_test_csv('test.csv', test_data)
+
+        # Run command
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('process_csv', '--once')
+            # Nothing is queued before the record is committed
+            mock_task.apply_async.assert_not_called()
+
+        # Verify the email was queued instead of sent, under the task id stored on the record
+        email_record = EmailRecord.objects.get()
+        self.assertTrue(email_record.task_id)
+        mock_task.apply_async.assert_called_once_with(
+            ('test1@example.com', '90210', 'California', 'Beverly Hills'), task_id=email_record.task_id
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        # No SMTP connection is needed when emails are queued
+        mock_get_connection.assert_not_called()
+
+    @override_settings(
+        CSV_INCOMING_DIR=None,
+        CSV_PROCESSED_DIR=None,
+        CSV_EMAIL_ASYNC=True
+    )
+    @patch('csv_processor.management.commands.process_csv.send_location_email')
+    @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
+    def test_async_email_not_queued_after_rollback(self, mock_get_location, mock_task):
+        # Setup
+        from django.conf import settings
+        settings.CSV_INCOMING_DIR = self.incoming_dir
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        mock_get_location.return_value = ('California', 'Beverly Hills')
+        self.create_test_csv('test.csv', [{'zip': '90210', 'email': 'test1@example.com'}])
+
+        # Run command, failing when the queued email's record is written
+        with self.captureOnCommitCallbacks(execute=True), \
+                patch.object(EmailRecord.objects, 'bulk_create', side_effect=Exception('Database Error')):
+            call_command('process_csv', '--once')
+
+        # Verify the rolled-back row never reached a worker
+        mock_task.apply_async.assert_not_called()
+        self.assertEqual(CSVProcessingRecord.objects.get().status, 'failed')
+
+    @override_settings(
+        CSV_INCOMING_DIR=None,
+        CSV_PROCESSED_DIR=None
+    )
+    @patch('csv_processor.management.commands.process_csv.BULK_CREATE_BATCH_SIZE', 2)
+    def test_failure_rolls_back_invalid_row_records(self):
+        # Setup
+        from django.conf import settings
+        settings.CSV_INCOMING_DIR = self.incoming_dir
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        # Create test CSV whose invalid rows span two record batches
+        test_data = [
+            {'zip': '', 'email': f'test{i}@example.com'} for i in range(4)
+        ]
+        self.create_test_csv('test.csv', test_data)
+
+        # Fail the second batch after the first one has been written
+        flush_email_records = Command.flush_email_records
+        calls = []
+
+        def failing_flush(command, pending):
+            calls.append(len(pending))
+            if len(calls) == 2:
+                raise Exception('Database Error')
+            return flush_email_records(command, pending)
+
+        # Run command
+        with patch.object(Command, 'flush_email_records', failing_flush):
+            call_command('process_csv', '--once')
+
+        # Verify the first batch was rolled back with the rest of the pass
+        self.assertEqual(EmailRecord.objects.count(), 0)
+        record = CSVProcessingRecord.objects.get()
+        self.assertEqual(record.status, 'failed')
+        self.assertEqual(record.total_rows, 0)
+
+    @override_settings(
+        CSV_INCOMING_DIR=None,
+        CSV_PROCESSED_DIR=None
+    )
+    @patch('csv_processor.management.commands.process_csv.EMAIL_BATCH_SIZE', 2)
+    @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
+    def test_sent_batches_kept_when_file_fails(self, mock_get_location):
+        # Setup
+        from django.conf import settings
+        settings.CSV_INCOMING_DIR = self.incoming_dir
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        mock_get_location.return_value = ('California', 'Beverly Hills')
+
+        # Create test CSV spanning two email batches
+        test_data = [
+            {'zip': '90210', 'email': f'test{i}@example.com'} for i in range(4)
+        ]
+        self.create_test_csv('test.csv', test_data)
+
+        # Fail recording the second sent batch
+        flush_email_records = Command.flush_email_records
+        calls = []
+
+        def failing_flush(command, pending):
+            if pending:
+                calls.append(len(pending))
+                if len(calls) == 2:
+                    raise Exception('Database Error')
+            return flush_email_records(command, pending)
+
+        # Run command
+        with patch.object(Command, 'flush_email_records', failing_flush):
+            call_command('process_csv', '--once')
+
+        # Verify the first batch, already delivered, keeps its records and counts
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(EmailRecord.objects.filter(success=True).count(), 2)
+        record = CSVProcessingRecord.objects.get()
+        self.assertEqual(record.status, 'failed')
+        self.assertEqual(record.total_rows, 2)
+        self.assertEqual(record.successful_rows, 2)
+
+    @override_settings(
+        CSV_INCOMING_DIR=None,
+        CSV_PROCESSED_DIR=None
+    )
+    @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
+    def test_final_update_writes_only_changed_fields(self, mock_get_location):
+        # Setup
+        from django.conf import settings
+        settings.CSV_INCOMING_DIR = self.incoming_dir
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        mock_get_location.return_value = ('California', 'Beverly Hills')
+        self.create_test_csv('test.csv', [{'zip': '90210', 'email': 'test1@example.com'}])
+
+        # Run command
+        with CaptureQueriesContext(connection) as queries:
+            call_command('process_csv', '--once')
+
+        # Verify the closing UPDATE leaves filename and processed_at alone
+        updates = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "csv_processor_csvprocessingrecord"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"status"', updates[0])
+        self.assertNotIn('"filename"', updates[0])
+        self.assertNotIn('"processed_at"', updates[0])
+
+    @patch('csv_processor.management.commands.process_csv.bulk_insert_models')
+    def test_flush_uses_copy_on_postgresql(self, mock_bulk_insert_models):
+        processing_record = CSVProcessingRecord.objects.create(filename='test.csv')
+        pending = [
+            EmailRecord(processing_record=processing_record, email_address='test@example.com',
+                        zip_code='90210', success=True)
+        ]
+        inserted = []
+        mock_bulk_insert_models.side_effect = inserted.extend
+
+        with patch.object(transaction.get_connection(), 'vendor', 'postgresql'):
+            successful = Command().flush_email_records(pending)
+
+        self.assertEqual(mock_bulk_insert_models.call_count, 1)
+        self.assertEqual([email_record.email_address for email_record in inserted], ['test@example.com'])
+        self.assertIsNotNone(inserted[0].processed_at)
+        self.assertEqual(successful, 1)
+        self.assertEqual(pending, [])
+
+    @override_settings(CSV_PROCESSED_DIR=None)
+    def test_move_to_processed_adds_timestamp_on_conflict(self):
+        from django.conf import settings
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        (self.processed_dir / 'test.csv').write_text('earlier file')
+        csv_path = self.create_test_csv('test.csv', [])
+
+        Command().move_to_processed(csv_path)
+
+        self.assertFalse(csv_path.exists())
+        self.assertEqual((self.processed_dir / 'test.csv').read_text(), 'earlier file')
+        self.assertEqual(len(list(self.processed_dir.glob('test_*.csv'))), 1)
+
+    @override_settings(CSV_PROCESSED_DIR=None)
+    def test_move_to_processed_never_overwrites(self):
+        from django.conf import settings
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        (self.processed_dir / 'test.csv').write_text('earlier file')
+
+        # Two more files with the same name, possibly within the same second
+        for content in ('second file', 'third file'):
+            csv_path = self.incoming_dir / 'test.csv'
+            csv_path.write_text(content)
+            Command().move_to_processed(csv_path)
+
+        contents = sorted(path.read_text() for path in self.processed_dir.glob('test*.csv'))
+        self.assertEqual(contents, ['earlier file', 'second file', 'third file'])
+
+    @override_settings(CSV_PROCESSED_DIR=None)
+    @patch('csv_processor.management.commands.process_csv.os.link')
+    def test_move_to_processed_across_filesystems(self, mock_link):
+        from django.conf import settings
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        mock_link.side_effect = OSError(errno.EXDEV, 'Invalid cross-device link')
+        csv_path = self.create_test_csv('test.csv', [{'zip': '90210', 'email': 'test@example.com'}])
+
+        Command().move_to_processed(csv_path)
+
+        self.assertFalse(csv_path.exists())
+        self.assertIn('90210', (self.processed_dir / 'test.csv').read_text())
+
+    @override_settings(CSV_PROCESSED_DIR=None)
+    @patch('csv_processor.management.commands.process_csv.os.link')
+    def test_move_to_processed_without_hard_links(self, mock_link):
+        from django.conf import settings
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        # Some filesystems (e.g. FAT or certain network mounts) refuse hard links
+        mock_link.side_effect = OSError(errno.EPERM, 'Operation not permitted')
+        csv_path = self.create_test_csv('test.csv', [{'zip': '90210', 'email': 'test@example.com'}])
+
+        Command().move_to_processed(csv_path)
+
+        self.assertFalse(csv_path.exists())
+        self.assertIn('90210', (self.processed_dir / 'test.csv').read_text())
+
+    def test_claim_file_is_exclusive(self):
+        csv_path = self.create_test_csv('test.csv', [])
+
+        claimed_path = Command().claim_file(csv_path)
+
+        self.assertEqual(claimed_path.name, 'test.csv')
+        self.assertEqual(claimed_path.parent.parent, self.incoming_dir / '.claimed')
+        self.assertTrue(claimed_path.exists())
+        self.assertFalse(csv_path.exists())
+        # A second worker racing for the same file gets nothing
+        self.assertIsNone(Command().claim_file(csv_path))
+        # Claimed files are no longer listed as incoming
+        self.assertEqual(Command().scan_incoming_directory(self.incoming_dir), [])
+
+    @override_settings(
+        CSV_INCOMING_DIR=None,
+        CSV_PROCESSED_DIR=None
+    )
+    @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
+    def test_scan_csv_dir_task(self, mock_get_location):
+        # Setup
+        from django.conf import settings
+        settings.CSV_INCOMING_DIR = self.incoming_dir
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        mock_get_location.return_value = ('California', 'Beverly Hills')
+        self.create_test_csv('test.csv', [{'zip': '90210', 'email': 'test1@example.com'}])
+
+        # Run the scheduled task in-process
+        scan_csv_dir.apply()
+
+        # Verify
+        self.assertEqual(CSVProcessingRecord.objects.get().status, 'completed')
+        self.assertTrue((self.processed_dir / 'test.csv').exists())
+
+    @override_settings(
+        CSV_INCOMING_DIR=None,
+        CSV_PROCESSED_DIR=None,
+        CSV_PROCESS_WORKERS=4
+    )
+    @patch('csv_processor.management.commands.process_csv.connections')
+    @patch('csv_processor.management.commands.process_csv.ProcessPoolExecutor')
+    @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
+    def test_files_processed_in_worker_pool(self, mock_get_location, mock_executor, mock_connections):
+        # Setup
+        from django.conf import settings
+        settings.CSV_INCOMING_DIR = self.incoming_dir
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        mock_get_location.return_value = ('California', 'Beverly Hills')
+        self.create_test_csv('a.csv', [{'zip': '90210', 'email': 'test1@example.com'}])
+        self.create_test_csv('b.csv', [{'zip': '90210', 'email': 'test2@example.com'}])
+
+        # Run submitted work inline so it shares the test database
+        def submit(fn, *args):
+            future = Future()
+            future.set_result(fn(*args))
+            return future
+
+        mock_executor.return_value.__enter__.return_value.submit.side_effect = submit
+
+        # Run command
+        call_command('process_csv', '--once')
+
+        # Verify one pool sized to the file count processed both files
+        mock_connections.close_all.assert_called_once_with()
+        mock_executor.assert_called_once_with(max_workers=2, mp_context=ANY, initializer=init_worker)
+        self.assertEqual(mock_executor.call_args.kwargs['mp_context'].get_start_method(), 'spawn')
+        self.assertEqual(CSVProcessingRecord.objects.filter(status='completed').count(), 2)
+        self.assertTrue((self.processed_dir / 'a.csv').exists())
+        self.assertTrue((self.processed_dir / 'b.csv').exists())
+
+    def test_worker_initializer_rebuilds_http_session(self):
+        from csv_processor.management.commands import process_csv
+
+        parent_session = process_csv.SESSION
+        self.addCleanup(setattr, process_csv, 'SESSION', parent_session)
+        init_worker()
+
+        self.assertIsNot(process_csv.SESSION, parent_session)
+
+    @override_settings(
+        CSV_INCOMING_DIR=None,
+        CSV_PROCESSED_DIR=None,
+        CSV_PROCESS_WORKERS=4
+    )
+    @patch('csv_processor.management.commands.process_csv.ProcessPoolExecutor')
+    @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
+    def test_single_file_processed_inline(self, mock_get_location, mock_executor):
+        # Setup
+        from django.conf import settings
+        settings.CSV_INCOMING_DIR = self.incoming_dir
+        settings.CSV_PROCESSED_DIR = self.processed_dir
+
+        mock_get_location.return_value = ('California', 'Beverly Hills')
+        self.create_test_csv('test.csv', [{'zip': '90210', 'email': 'test1@example.com'}])
+
+        # Run command
+        call_command('process_csv', '--once')
+
+        # Verify no worker pool is started for one file
+        mock_executor.assert_not_called()
+        self.assertEqual(CSVProcessingRecord.objects.get().status, 'completed')
+
+    def test_scan_incoming_directory(self):
+        csv_path = self.create_test_csv('test.csv', [])
+        self.create_test_csv('.hidden.csv', [])
+        (self.incoming_dir / 'notes.txt').write_text('not a csv')
+        (self.incoming_dir / 'folder.csv').mkdir()
+
+        self.assertEqual(Command().scan_incoming_directory(self.incoming_dir), [csv_path])
+
     @override_settings(
         CSV_INCOMING_DIR=None,
         CSV_PROCESSED_DIR=None
@@ -206,6 +880,217 @@ class ProcessCSVCommandTest(TestCase):
         self.assertEqual(EmailRecord.objects.count(), 0)
 
 
+@override_settings(CSV_EMAIL_ASYNC=True)
+class AsyncEmailQueueTest(TransactionTestCase):
+    """Test queuing emails after the records are committed, outside the test transaction"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.test_dir, ignore_errors=True)
+        self.csv_path = Path(self.test_dir) / 'test.csv'
+        with open(self.csv_path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=['zip', 'email'])
+            writer.writeheader()
+            writer.writerows({'zip': '90210', 'email': f'test{i}@example.com'} for i in range(3))
+
+    @patch('csv_processor.management.commands.process_csv.send_location_email')
+    @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
+    def test_queue_error_marks_only_that_email_failed(self, mock_get_location, mock_task):
+        mock_get_location.return_value = ('California', 'Beverly Hills')
+        # The broker fails on the second row only
+        mock_task.apply_async.side_effect = [None, Exception('Broker unavailable'), None]
+
+        with self.settings(CSV_PROCESSED_DIR=Path(self.test_dir), CSV_FAILED_DIR=Path(self.test_dir)):
+            Command(stdout=StringIO()).process_single_csv(self.csv_path)
+
+        # Verify every row was still queued and the file completed with accurate counts
+        self.assertEqual(mock_task.apply_async.call_count, 3)
+        record = CSVProcessingRecord.objects.get()
+        self.assertEqual(record.status, 'completed')
+        self.assertEqual(record.successful_rows, 2)
+        self.assertEqual(record.failed_rows, 1)
+        failed_record = EmailRecord.objects.get(success=False)
+        self.assertEqual(failed_record.email_address, 'test1@example.com')
+        self.assertIn('Broker unavailable', failed_record.error_message)
+
+
+class ZipLookupTest(TestCase):
+    """Test ZIP API lookups"""
+
+    def setUp(self):
+        load_zip_table.cache_clear()
+
+    @patch('csv_processor.management.commands.process_csv.SESSION')
+    def test_get_location_from_zip(self, mock_session):
+        """Test that state and city are read from the first place"""
+        mock_session.get.return_value.json.return_value = {
+            'places': [{'state': 'California', 'place name': 'Beverly Hills'}]
+        }
+
+        self.assertEqual(Command().get_location_from_zip('90210'), ('California', 'Beverly Hills'))
+        mock_session.get.assert_called_once_with('https://api.zippopotam.us/us/90210', timeout=5)
+
+    @patch('csv_processor.management.commands.process_csv.SESSION')
+    def test_zip_plus_four_uses_five_digit_prefix(self, mock_session):
+        """Test that ZIP+4 codes are fetched by their 5-digit prefix"""
+        mock_session.get.return_value.json.return_value = {
+            'places': [{'state': 'California', 'place name': 'Beverly Hills'}]
+        }
+
+        self.assertEqual(Command().get_location_from_zip('90210-1234'), ('California', 'Beverly Hills'))
+        mock_session.get.assert_called_once_with('https://api.zippopotam.us/us/90210', timeout=5)
+
+    @patch('csv_processor.management.commands.process_csv.SESSION')
+    def test_get_location_from_zip_request_error(self, mock_session):
+        """Test that request failures are reported as API errors"""
+        mock_session.get.side_effect = requests.ConnectionError('connection refused')
+
+        with self.assertRaisesMessage(Exception, 'API error for ZIP 90210'):
+            Command().get_location_from_zip('90210')
+
+    @patch('csv_processor.management.commands.process_csv.SESSION')
+    def test_repeated_zip_uses_cache(self, mock_session):
+        """Test that a ZIP code is fetched from the API only once"""
+        mock_session.get.return_value.json.return_value = {
+            'places': [{'state': 'California', 'place name': 'Beverly Hills'}]
+        }
+
+        command = Command()
+        command.lookup_locations({'90210'})
+        command.lookup_locations({'90210'})
+        self.assertEqual(mock_session.get.call_count, 1)
+
+    @patch('csv_processor.management.commands.process_csv.SESSION')
+    def test_lookups_persist_in_zip_cache(self, mock_session):
+        """Test that looked-up ZIP codes are reused across runs until they expire"""
+        mock_session.get.return_value.json.return_value = {
+            'places': [{'state': 'California', 'place name': 'Beverly Hills'}]
+        }
+
+        command = Command()
+        self.assertEqual(command.lookup_locations({'90210'}), {'90210': ('California', 'Beverly Hills')})
+        self.assertEqual(ZipCache.objects.get().city, 'Beverly Hills')
+
+        # A later run is answered from the cache table
+        self.assertEqual(command.lookup_locations({'90210'}), {'90210': ('California', 'Beverly Hills')})
+        self.assertEqual(mock_session.get.call_count, 1)
+
+        # Expired entries are looked up again and replaced
+        ZipCache.objects.update(fetched_at=timezone.now() - timedelta(days=31))
+        command.lookup_locations({'90210'})
+        self.assertEqual(mock_session.get.call_count, 2)
+        self.assertGreater(ZipCache.objects.get().fetched_at, timezone.now() - timedelta(days=1))
+
+    @patch('csv_processor.management.commands.process_csv.SESSION')
+    def test_local_zip_data_skips_api(self, mock_session):
+        """Test that ZIP codes in the local dataset are resolved without the API"""
+        mock_session.get.return_value.json.return_value = {
+            'places': [{'state': 'New York', 'place name': 'New York City'}]
+        }
+        test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, test_dir, ignore_errors=True)
+        zip_data_file = Path(test_dir) / 'zipcodes.csv'
+        zip_data_file.write_text('zip,state,city\n90210,California,Beverly Hills\n', encoding='utf-8')
+
+        command = Command()
+        with self.settings(ZIP_DATA_FILE=zip_data_file):
+            self.assertEqual(command.get_location_from_zip('90210'), ('California', 'Beverly Hills'))
+            self.assertEqual(command.get_location_from_zip('90210-1234'), ('California', 'Beverly Hills'))
+            mock_session.get.assert_not_called()
+
+            # ZIP codes missing from the dataset fall back to the API
+            self.assertEqual(command.get_location_from_zip('10001'), ('New York', 'New York City'))
+            self.assertEqual(mock_session.get.call_count, 1)
+
+    @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
+    def test_lookup_locations_captures_errors(self, mock_get_location):
+        """Test that concurrent lookups map each ZIP code to its result or error"""
+        error = Exception('API Error')
+
+        def fake_lookup(zip_code):
+            if zip_code == '10001':
+                raise error
+            return {'90210': ('California', 'Beverly Hills'), '60601': ('Illinois', 'Chicago')}[zip_code]
+
+        mock_get_location.side_effect = fake_lookup
+
+        zip_results = Command().lookup_locations({'90210', '10001', '60601'})
+
+        self.assertEqual(zip_results, {
+            '90210': ('California', 'Beverly Hills'),
+            '10001': error,
+            '60601': ('Illinois', 'Chicago'),
+        })
+
+
+@patch('csv_processor.management.commands.process_csv.FILE_SETTLE_SECONDS', 0)
+class CSVFileHandlerTest(TestCase):
+    """Test that filesystem events trigger CSV processing"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.incoming_dir = Path(self.test_dir) / 'incoming'
+        self.incoming_dir.mkdir()
+        self.command = Mock()
+        self.handler = CSVFileHandler(self.command)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_created_csv_is_processed(self):
+        csv_path = self.incoming_dir / 'test.csv'
+        csv_path.write_text('zip,email\n90210,test@example.com\n')
+
+        with self.settings(CSV_INCOMING_DIR=self.incoming_dir):
+            self.handler.dispatch(FileCreatedEvent(str(csv_path)))
+
+        self.command.process_single_csv.assert_called_once_with(csv_path)
+
+    def test_processing_error_does_not_stop_observer(self):
+        csv_path = self.incoming_dir / 'test.csv'
+        csv_path.write_text('zip,email\n90210,test@example.com\n')
+        self.command.process_single_csv.side_effect = RuntimeError('Database unavailable')
+
+        with self.settings(CSV_INCOMING_DIR=self.incoming_dir):
+            with self.assertLogs('csv_processor.management.commands.process_csv', level='ERROR') as logs:
+                self.handler.dispatch(FileCreatedEvent(str(csv_path)))
+
+        self.command.process_single_csv.assert_called_once_with(csv_path)
+        self.assertIn('Unexpected error processing', logs.output[0])
+
+    def test_csv_moved_into_incoming_is_processed(self):
+        csv_path = self.incoming_dir / 'test.csv'
+        csv_path.write_text('zip,email\n90210,test@example.com\n')
+
+        with self.settings(CSV_INCOMING_DIR=self.incoming_dir):
+            self.handler.dispatch(FileMovedEvent(str(self.incoming_dir / 'test.tmp'), str(csv_path)))
+
+        self.command.process_single_csv.assert_called_once_with(csv_path)
+
+    def test_non_csv_and_missing_files_are_ignored(self):
+        txt_path = self.incoming_dir / 'notes.txt'
+        txt_path.write_text('not a csv')
+
+        with self.settings(CSV_INCOMING_DIR=self.incoming_dir):
+            self.handler.dispatch(FileCreatedEvent(str(txt_path)))
+            self.handler.dispatch(FileCreatedEvent(str(self.incoming_dir / 'gone.csv')))
+
+        self.command.process_single_csv.assert_not_called()
+
+    @patch('csv_processor.management.commands.process_csv.Observer')
+    def test_observer_started_before_catch_up_scan(self, mock_observer):
+        calls = []
+        mock_observer.return_value.start.side_effect = lambda: calls.append('start')
+        command = Command(stdout=StringIO())
+
+        with self.settings(CSV_INCOMING_DIR=self.incoming_dir), \
+                patch.object(command, 'process_csv_files', side_effect=lambda: calls.append('scan')):
+            command.watch_incoming_directory()
+
+        # Files created during the scan still produce events
+        self.assertEqual(calls, ['start', 'scan'])
+
+
 class LoggingTest(TestCase):
     """Test that logging is working correctly"""
     
@@ -214,8 +1099,13 @@ class LoggingTest(TestCase):
         self.test_dir = tempfile.mkdtemp()
         self.incoming_dir = Path(self.test_dir) / 'incoming'
         self.processed_dir = Path(self.test_dir) / 'processed'
+        self.failed_dir = Path(self.test_dir) / 'failed'
         self.incoming_dir.mkdir()
         self.processed_dir.mkdir()
+        self.failed_dir.mkdir()
+        failed_dir_override = override_settings(CSV_FAILED_DIR=self.failed_dir)
+        failed_dir_override.enable()
+        self.addCleanup(failed_dir_override.disable)
 
     def tearDown(self):
         # Clean up temporary directories
@@ -235,8 +1125,7 @@ class LoggingTest(TestCase):
         CSV_PROCESSED_DIR=None
     )
     @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
-    @patch('csv_processor.management.commands.process_csv.send_mail')
-    def test_logging_messages(self, mock_send_mail, mock_get_location):
+    def test_logging_messages(self, mock_get_location):
         """Test that appropriate log messages are generated"""
         # Setup
         from django.conf import settings
@@ -262,15 +1151,14 @@ class LoggingTest(TestCase):
         self.assertIn('Processing CSV file: test.csv', log_output)
         self.assertIn('Email sent successfully', log_output)
         self.assertIn('Completed processing test.csv', log_output)
-        self.assertIn('Moving processed file', log_output)
+        self.assertIn('Moved processed file', log_output)
 
     @override_settings(
         CSV_INCOMING_DIR=None,
         CSV_PROCESSED_DIR=None
     )
     @patch('csv_processor.management.commands.process_csv.Command.get_location_from_zip')
-    @patch('csv_processor.management.commands.process_csv.send_mail')
-    def test_warning_logging_for_missing_data(self, mock_send_mail, mock_get_location):
+    def test_warning_logging_for_missing_data(self, mock_get_location):
         """Test that warnings are logged for missing data"""
         # Setup
         from django.conf import settings
@@ -295,6 +1183,70 @@ class LoggingTest(TestCase):
         self.assertIn('MISSING', log_output)
 
 
+class SendLocationEmailTaskTest(TestCase):
+    """Test the Celery email task"""
+
+    def test_sends_email(self):
+        send_location_email.apply(args=('test@example.com', '90210', 'California', 'Beverly Hills'))
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['test@example.com'])
+        self.assertEqual(mail.outbox[0].subject, 'Location Information for ZIP 90210')
+        self.assertEqual(
+            mail.outbox[0].body,
+            '\nHello,\n\nHere is the location information for ZIP code 90210:\n\n'
+            'City: Beverly Hills\nState: California\n\nThank you!\n'
+        )
+
+    @patch('django.core.mail.EmailMessage.send')
+    def test_final_failure_marks_record_failed(self, mock_send):
+        mock_send.side_effect = Exception('SMTP Error')
+        processing_record = CSVProcessingRecord.objects.create(filename='test.csv')
+        EmailRecord.objects.create(
+            processing_record=processing_record,
+            email_address='test@example.com',
+            zip_code='90210',
+            success=True,
+            task_id='task-1'
+        )
+
+        # Run the last allowed attempt
+        result = send_location_email.apply(
+            args=('test@example.com', '90210', 'California', 'Beverly Hills'),
+            task_id='task-1', retries=3
+        )
+
+        self.assertTrue(result.failed())
+        email_record = EmailRecord.objects.get()
+        self.assertFalse(email_record.success)
+        self.assertEqual(email_record.error_message, 'SMTP Error')
+
+
+class AdminQuerysetTest(TestCase):
+    """Test that admin querysets avoid per-row queries"""
+
+    def setUp(self):
+        self.processing_record = CSVProcessingRecord.objects.create(filename='test.csv')
+        for i in range(3):
+            EmailRecord.objects.create(
+                processing_record=self.processing_record,
+                email_address=f'test{i}@example.com',
+                zip_code='90210'
+            )
+        self.request = RequestFactory().get('/admin/')
+
+    def test_processing_record_queryset_does_not_join_emails(self):
+        # The row counts are stored on the record, so the changelist never scans EmailRecord
+        queryset = CSVProcessingRecordAdmin(CSVProcessingRecord, admin.site).get_queryset(self.request)
+        self.assertNotIn(EmailRecord._meta.db_table, str(queryset.query))
+
+    def test_email_record_queryset_selects_processing_record(self):
+        queryset = EmailRecordAdmin(EmailRecord, admin.site).get_queryset(self.request)
+        with self.assertNumQueries(1):
+            filenames = [email_record.processing_record.filename for email_record in queryset]
+        self.assertEqual(filenames, ['test.csv'] * 3)
+
+
 class EmailMaskingTest(TestCase):
     """Test email masking functionality for security"""
     
@@ -0,0 +1,24 @@
+import django
+from django.apps import apps
+
+# Kept free of model imports so worker processes started with spawn or
+# forkserver can unpickle these functions before Django is set up.
+
+
+def init_worker():
+    """Set up Django in a new CSV worker process"""
+    if not apps.ready:
+        django.setup()
+    # Imported here because Django must be set up first
+    from csv_processor.management.commands import process_csv
+
+    # Never share the parent's HTTP connection pool with a worker
+    process_csv.SESSION = process_csv.build_session()
+
+
+def process_file(csv_file_path):
+    """Process one CSV file in a worker process"""
+    # Imported here because Django must be set up first
+    from csv_processor.management.commands.process_csv import Command
+
+    Command().process_single_csv(csv_file_path)
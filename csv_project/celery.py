@@ -0,0 +1,19 @@
+"""
+Celery application for csv_project project.
+
+Workers are started with ``celery -A csv_project worker``. Configuration is
+read from Django settings prefixed with ``CELERY_``.
+
+For more information on this file, see
+https://docs.celeryq.dev/en/stable/django/first-steps-with-django.html
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'csv_project.settings')
+
+app = Celery('csv_project')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
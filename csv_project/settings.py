@@ -127,11 +127,29 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = 'noreply@example.com'
 
+# Celery settings
+# https://docs.celeryq.dev/en/stable/django/first-steps-with-django.html
+CELERY_BROKER_URL = 'redis://localhost:6379/0'
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_BEAT_SCHEDULE = {
+    'scan-incoming-csv': {
+        'task': 'csv_processor.tasks.scan_csv_dir',
+        'schedule': 120.0,  # seconds
+    },
+}
+
 # CSV Processing settings
 CSV_INCOMING_DIR = BASE_DIR / 'incoming'
 CSV_PROCESSED_DIR = BASE_DIR / 'processed'
+CSV_FAILED_DIR = BASE_DIR / 'failed'  # files that could not be processed; move back to incoming to retry
 ZIP_API_URL = 'https://api.zippopotam.us/us/{zip}'
 ZIP_API_TIMEOUT = 5  # seconds
+ZIP_API_MAX_WORKERS = 32  # concurrent ZIP API lookups per CSV file
+# Optional local zip,state,city CSV; ZIP codes found there skip the API entirely
+ZIP_DATA_FILE = BASE_DIR / 'zipcodes.csv'
+ZIP_CACHE_TIMEOUT = 60 * 60 * 24 * 30  # seconds a ZIP API result is reused (30 days)
+CSV_EMAIL_ASYNC = False  # queue emails to Celery workers instead of sending them inline
+CSV_PROCESS_WORKERS = 1  # CSV files processed in parallel processes; keep at 1 on SQLite, which allows one writer
 
 # Logging configuration
 # https://docs.djangoproject.com/en/4.2/topics/logging/